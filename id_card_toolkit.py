@@ -1,7 +1,21 @@
 import json
 import datetime
-from collections import defaultdict
+import functools
+import operator
+import os
+import shutil
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+IO_BUFFER_SIZE = 1 << 20  # 号码列表/结果/报告文件的读写缓冲区大小 (1 MiB)
+PARSE_CACHE_SIZE = 100_000  # parse() 结果缓存的最大条目数
+PARALLEL_MIN_RECORDS = 200_000  # 命令行批量分析记录数达到此值时才启用多进程, 避免小批量被进程启动开销拖慢
+PARALLEL_CHUNK_SIZE = 50_000  # 并行分析时每个任务块的最大记录数
+
+# 行政区划文件 JSON 解析结果的进程级缓存: 绝对路径 -> (修改时间, pca_data); 文件被修改后覆盖原条目
+_PCA_CACHE: dict[str, tuple[int, list]] = {}
 
 class IDCardToolkit:
     """
@@ -13,55 +27,102 @@ class IDCardToolkit:
     4. 独立验证
     """
 
-    def __init__(self, json_path='pca-code.json'):
+    def __init__(self, json_path='pca-code.json', area_codes: dict = None):
+        # 传入 area_codes 时直接使用该代码表而不读取文件 (供并行分析的子进程复用主进程数据)
+        if area_codes is not None:
+            self.pca_data, self.area_codes = None, area_codes
+            self.area_triples = self._build_area_triples()
+        else:
+            self._load_area_codes(json_path)
+        
+        self.WEIGHTS = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
+        self.CHECKSUM_MAP = '10X98765432'  # 余数 0-10 对应的校验码, 按下标取单个字符
+        self.LAST_CHARS = frozenset('0123456789X')
+        self._ascii_offset_sum = ord('0') * sum(self.WEIGHTS)
+        # 查找表: _lut[位次][数字] = 数字 * 加权因子 % 11
+        self._lut = [[digit * weight % 11 for digit in range(10)] for weight in self.WEIGHTS]
+        # 顺序码 000-999 的字符串及其在校验和中的贡献, 供 guess 直接拼接
+        self._seq_tails = [(f"{i:03d}", self._lut[14][i // 100] + self._lut[15][i // 10 % 10] + self._lut[16][i % 10]) for i in range(1000)]
+        self._parse_cached = functools.lru_cache(maxsize=PARSE_CACHE_SIZE)(self._parse_uncached)
+
+    def _load_area_codes(self, json_path):
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                self.pca_data = json.load(f)
+            # 同一文件 (路径 + 修改时间) 的 JSON 只解析一次; 展开后的代码表每个实例各自构建, 互不影响
+            cache_path, mtime = os.path.abspath(json_path), os.stat(json_path).st_mtime_ns
+            cached = _PCA_CACHE.get(cache_path)
+            if cached is not None and cached[0] == mtime:
+                self.pca_data = cached[1]
+            else:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    self.pca_data = json.load(f)
+                _PCA_CACHE[cache_path] = (mtime, self.pca_data)
             self.area_codes = self._flatten_codes(self.pca_data)
+            self.area_triples = self._build_area_triples()
         except FileNotFoundError:
             print(f"错误：未找到行政区划文件 '{json_path}'。请确保文件存在于同目录下。")
             self.area_codes = {}
-        
-        self.WEIGHTS = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
-        self.CHECKSUM_MAP = ['1', '0', 'X', '9', '8', '7', '6', '5', '4', '3', '2']
-
-    def _flatten_codes(self, data, parent_name='', result=None):
-        if result is None: result = {}
-        for item in data:
-            code, current_full_name = item['code'], parent_name + item['name']
-            result[code] = current_full_name
-            if 'children' in item:
-                self._flatten_codes(item['children'], current_full_name, result)
+            self.area_triples = {}
+
+    def _flatten_codes(self, data):
+        # 用显式栈 (子节点列表, 上级全称) 代替递归遍历行政区划树
+        result, stack = {}, [(data, '')]
+        while stack:
+            items, parent_name = stack.pop()
+            for item in items:
+                current_full_name = parent_name + item['name']
+                result[item['code']] = current_full_name
+                children = item.get('children')
+                if children: stack.append((children, current_full_name))
         return result
 
+    def _area_triple(self, area_code: str) -> tuple[str, str, str]:
+        province_code, city_code = area_code[:2], area_code[:4]
+        return (self.area_codes.get(province_code, f"未知省份({province_code})"), self.area_codes.get(city_code, f"未知城市({city_code})"), self.area_codes.get(area_code, f"未知区县({area_code})"))
+
+    def _build_area_triples(self) -> dict[str, tuple[str, str, str]]:
+        # 预先为每个6位区县代码拼好 (省, 市, 区县) 名称, parse 时只需一次查表
+        return {code: self._area_triple(code) for code in self.area_codes if len(code) == 6}
+
     def _calculate_checksum(self, id_prefix: str) -> str:
-        if not (isinstance(id_prefix, str) and len(id_prefix) == 17 and id_prefix.isdigit()):
+        if not (isinstance(id_prefix, str) and len(id_prefix) == 17 and id_prefix.isascii() and id_prefix.isdigit()):
             raise ValueError("输入必须是17位数字字符串")
-        total = sum(int(digit) * weight for digit, weight in zip(id_prefix, self.WEIGHTS))
+        return self._checksum_of(id_prefix)
+
+    def _checksum_of(self, id_prefix: str) -> str:
+        # 不做输入检查的校验码计算内核, 仅供已确认前17位为数字的调用方使用
+        # 字节值即 ASCII 码, 逐位乘权重后整体减去 '0' 的偏移量, 整个求和在 C 层完成
+        total = sum(map(operator.mul, id_prefix.encode('ascii'), self.WEIGHTS)) - self._ascii_offset_sum
         return self.CHECKSUM_MAP[total % 11]
 
-    def validate(self, id_number: str) -> tuple[bool, str]:
+    def _parse_birth_date(self, birth_date_str: str) -> datetime.date:
+        # 直接切片构造日期, 比 strptime 快得多; 非法日期同样由 date() 抛出 ValueError
+        return datetime.date(int(birth_date_str[:4]), int(birth_date_str[4:6]), int(birth_date_str[6:8]))
+
+    def validate(self, id_number: str, *, today: datetime.date = None) -> tuple[bool, str]:
+        # today 供批量校验时传入, 避免每条记录都重新获取当前日期
         id_number = id_number.strip().upper()
-        if not (isinstance(id_number, str) and len(id_number) == 18):
-            return False, "长度错误：必须为18位"
-        prefix = id_number[:-1]
-        if not prefix.isdigit():
-            return False, "格式错误：前17位必须是数字"
-        last_char = id_number[-1]
-        if not (last_char.isdigit() or last_char == 'X'):
-            return False, "格式错误：最后一位必须是数字或'X'"
+        prefix, last_char = id_number[:-1], id_number[-1:]
+        # 格式正确时一次组合判断即可通过; 仅在不通过时逐项检查以给出具体错误原因
+        if not (len(id_number) == 18 and prefix.isascii() and prefix.isdigit() and last_char in self.LAST_CHARS):
+            if len(id_number) != 18:
+                return False, "长度错误：必须为18位"
+            # isdigit() 也接受全角等 Unicode 数字, 须同时要求 ASCII
+            if not (prefix.isascii() and prefix.isdigit()):
+                return False, "格式错误：前17位必须是数字"
+            if not (last_char.isdigit() or last_char == 'X'):
+                return False, "格式错误：最后一位必须是数字或'X'"
         area_code = id_number[:6]
         if area_code not in self.area_codes:
             return False, f"地址码错误：无效的行政区划代码 {area_code}"
         birth_date_str = id_number[6:14]
         try:
-            birth_date = datetime.datetime.strptime(birth_date_str, "%Y%m%d")
-            if birth_date > datetime.datetime.now():
+            birth_date = self._parse_birth_date(birth_date_str)
+            if birth_date > (today or datetime.date.today()):
                 return False, f"日期错误：出生日期不能是未来日期 {birth_date_str}"
         except ValueError:
             return False, f"日期错误：无效的出生日期格式 {birth_date_str}"
         try:
-            expected_checksum = self._calculate_checksum(prefix)
+            expected_checksum = self._checksum_of(prefix)
             if last_char != expected_checksum:
                 return False, f"校验码错误：计算值应为 '{expected_checksum}'，提供值为 '{last_char}'"
         except ValueError:
@@ -69,57 +130,145 @@ class IDCardToolkit:
         return True, "身份证号码有效"
 
     def parse(self, id_number: str) -> dict:
-        is_valid, message = self.validate(id_number)
-        if not is_valid: return {"valid": False, "error": message}
+        # 缓存只保存不可变的解析字段 (按号码与当天日期, 跨日后年龄会重新计算), 每次调用都构造新的结果字典
+        is_valid, fields = self._parse_cached(id_number, datetime.date.today())
+        if not is_valid: return {"valid": False, "error": fields}
+        return self._fields_to_result(fields)
+
+    def _parse_uncached(self, id_number: str, today: datetime.date) -> tuple:
+        is_valid, message = self.validate(id_number, today=today)
+        if not is_valid: return False, message
+        return True, self._parse_validated(id_number, today)
+
+    def _parse_validated(self, id_number: str, today: datetime.date) -> tuple:
+        # 仅提取信息, 调用方须保证号码已通过 validate; 返回不可变的字段元组, 由 _fields_to_result 转为结果字典
         area_code, birth_date_str = id_number[:6], id_number[6:14]
-        province_code, city_code = area_code[:2], area_code[:4]
-        birth_date = datetime.datetime.strptime(birth_date_str, "%Y%m%d")
-        today = datetime.date.today()
+        area_triple = self.area_triples.get(area_code) or self._area_triple(area_code)
+        birth_date = self._parse_birth_date(birth_date_str)
         age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-        seq_code, gender = int(id_number[14:17]), "男 (Male)" if int(id_number[16]) % 2 != 0 else "女 (Female)"
-        return {"valid": True, "address_code": area_code, "address_info": {"province": self.area_codes.get(province_code, f"未知省份({province_code})"), "city": self.area_codes.get(city_code, f"未知城市({city_code})"), "district": self.area_codes.get(area_code, f"未知区县({area_code})")}, "birth_date": birth_date.strftime("%Y-%m-%d"), "age": age, "gender": gender, "sequence_code": id_number[14:17], "checksum": id_number[-1]}
+        gender = "男 (Male)" if int(id_number[16]) % 2 != 0 else "女 (Female)"
+        return area_code, area_triple, birth_date.strftime("%Y-%m-%d"), age, gender, id_number[14:17], id_number[-1]
+
+    def _fields_to_result(self, fields: tuple) -> dict:
+        area_code, (province, city, district), birth_date, age, gender, sequence_code, checksum = fields
+        return {"valid": True, "address_code": area_code, "address_info": {"province": province, "city": city, "district": district}, "birth_date": birth_date, "age": age, "gender": gender, "sequence_code": sequence_code, "checksum": checksum}
 
     def guess(self, area_code: str, birth_date: str, gender: str) -> list:
-        if area_code not in self.area_codes: return [f"错误: 无效或不存在的行政区划代码 {area_code}"]
-        try: datetime.datetime.strptime(birth_date, "%Y%m%d")
+        # 省/市级代码 (2/4位) 虽在 area_codes 中, 但不能作为6位地址码
+        if len(area_code) != 6 or area_code not in self.area_codes: return [f"错误: 无效或不存在的行政区划代码 {area_code}"]
+        try:
+            if not (len(birth_date) == 8 and birth_date.isascii() and birth_date.isdigit()): raise ValueError
+            datetime.datetime.strptime(birth_date, "%Y%m%d")
         except ValueError: return [f"错误: 无效的出生日期格式 {birth_date} (应为 YYYYMMDD)"]
         gender = gender.upper()
         if gender not in ['M', 'F']: return ["错误: 性别必须是 'M' 或 'F'"]
-        prefix_14, possible_ids = area_code + birth_date, []
+        prefix_14 = area_code + birth_date
         start = 1 if gender == 'M' else 2
-        for i in range(start, 1000, 2):
-            seq_code = f"{i:03d}"
-            prefix_17 = prefix_14 + seq_code
-            possible_ids.append(prefix_17 + self._calculate_checksum(prefix_17))
-        return possible_ids
-
-    def analyze_population_sample(self, id_list: list) -> dict:
-        valid_ids, invalid_details = [], []
+        # 前14位在所有候选号码中相同, 只需加权求和一次; 顺序码部分直接取预先算好的贡献值
+        base_sum = sum((digit - 48) * weight for digit, weight in zip(prefix_14.encode('ascii'), self.WEIGHTS))
+        checksum_map = self.CHECKSUM_MAP
+        return [f"{prefix_14}{seq_code}{checksum_map[(base_sum + seq_sum) % 11]}" for seq_code, seq_sum in self._seq_tails[start::2]]
+
+    def _check_birth_date(self, birth_date_str: str, today: datetime.date, valid_dates: set) -> bool:
+        # 批量快速路径用: 日期有效且不晚于 today 时记入 valid_dates
+        try:
+            if self._parse_birth_date(birth_date_str) > today: return False
+        except ValueError:
+            return False
+        valid_dates.add(birth_date_str)
+        return True
+
+    def _collect_stats(self, id_list: list, today: datetime.date, add_invalid: Callable[[dict], None]) -> tuple[int, int, dict]:
+        # 校验并按 (地址码, 出生日期) 汇总一批号码, 返回 (有效数, 无效数, 分组统计); 串行分析与并行子进程共用
+        valid_count, invalid_count = 0, 0
+        # 每组 (地址码, 出生日期) 只需记录 [最大女性顺序码, 最大男性顺序码, 女性样本数, 男性样本数]
+        # 顺序码奇数为男、偶数为女, 用 seq & 1 直接作为下标, 省去按性别分支
+        stats = {}
+        # 热循环中把方法和属性查找提前绑定到局部变量
+        validate, stats_get, area_codes = self.validate, stats.get, self.area_codes
+        checksum_map, weights, offset_sum, mul = self.CHECKSUM_MAP, self.WEIGHTS, self._ascii_offset_sum, operator.mul
+        # 本批中已确认有效的出生日期串; 同批号码的出生日期高度重复, 每个日期只解析一次 (只记录有效日期, 规模受日历天数约束)
+        valid_dates = set()
+        # 校验与分组统计在同一遍循环中完成, 不再保留有效号码的中间列表
         for id_number in id_list:
-            is_valid, message = self.validate(id_number)
-            if is_valid: valid_ids.append(id_number)
-            else: invalid_details.append({"号码": id_number, "错误原因": message})
-        
-        stats = defaultdict(lambda: {"male_seqs": [], "female_seqs": []})
-        for id_number in valid_ids:
+            prefix, birth_date_str = id_number[:17], id_number[6:14]
+            # 快速路径: 规范的有效号码只需几次 C 层判断、两次查表和一次编码求和, 不构造任何结果或消息
+            if (len(id_number) == 18 and prefix.isascii() and prefix.isdigit() and id_number[:6] in area_codes
+                    and (birth_date_str in valid_dates or self._check_birth_date(birth_date_str, today, valid_dates))
+                    and checksum_map[(sum(map(mul, prefix.encode('ascii'), weights)) - offset_sum) % 11] == id_number[17]):
+                is_valid = True
+            else:
+                # 未通过快速路径的号码 (包括需去除空格或含小写 x 的号码) 交给 validate 得出结论和具体原因
+                is_valid, message = validate(id_number, today=today)
+            if not is_valid:
+                add_invalid({"号码": id_number, "错误原因": message})
+                invalid_count += 1
+                continue
+            valid_count += 1
             key, seq = (id_number[:6], id_number[6:14]), int(id_number[14:17])
-            if seq % 2 != 0: stats[key]["male_seqs"].append(seq)
-            else: stats[key]["female_seqs"].append(seq)
+            entry = stats_get(key)
+            if entry is None: entry = stats[key] = [0, 0, 0, 0]
+            is_male = seq & 1
+            if seq > entry[is_male]: entry[is_male] = seq
+            entry[2 + is_male] += 1
+        return valid_count, invalid_count, stats
+
+    def analyze_population_sample(self, id_list: list, invalid_sink: Callable[[dict], None] = None, workers: int = 1) -> dict:
+        # 传入 invalid_sink 时, 无效记录逐条交给它处理而不在内存中累积, 返回的 invalid_details 为空列表
+        # workers 为并行进程数, 默认串行; 大于1时由调用方负责多进程的运行环境 (如 __main__ 保护)
+        invalid_details, today = [], datetime.date.today()
+        add_invalid = invalid_sink or invalid_details.append
+        workers = min(workers, len(id_list))
+        if workers <= 1:
+            valid_count, invalid_count, stats = self._collect_stats(id_list, today, add_invalid)
+        else:
+            # 按连续区间切成不超过 PARALLEL_CHUNK_SIZE 的小块, 合并时按块顺序处理, 保证无效记录与分组顺序和串行结果一致;
+            # 子进程无法直接调用 invalid_sink, 无效记录以 (号码, 原因) 元组按块回传, 内存占用受块大小约束而非无效记录总数
+            chunk_size = min(-(-len(id_list) // workers), PARALLEL_CHUNK_SIZE)
+            chunks = [id_list[i:i + chunk_size] for i in range(0, len(id_list), chunk_size)]
+            valid_count, invalid_count, stats = 0, 0, {}
+            # 子进程使用本实例的 area_codes, 保证与串行结果一致 (即使文件已改动或代码表在内存中被修改)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.area_codes,)) as executor:
+                for chunk_valid, chunk_invalid, chunk_stats in executor.map(_analyze_chunk, chunks, [today] * len(chunks)):
+                    valid_count += chunk_valid
+                    invalid_count += len(chunk_invalid)
+                    for id_number, message in chunk_invalid: add_invalid({"号码": id_number, "错误原因": message})
+                    for key, chunk_entry in chunk_stats.items():
+                        entry = stats.get(key)
+                        if entry is None: stats[key] = chunk_entry
+                        else: entry[:] = max(entry[0], chunk_entry[0]), max(entry[1], chunk_entry[1]), entry[2] + chunk_entry[2], entry[3] + chunk_entry[3]
         
         analysis_report = {}
-        for key, data in stats.items():
+        for key, (max_female_seq, max_male_seq, female_count, male_count) in stats.items():
             area_code, date_str = key
             area_name = self.area_codes.get(area_code, "未知地区")
-            max_male_seq, max_female_seq = (max(data["male_seqs"]) if data["male_seqs"] else 0), (max(data["female_seqs"]) if data["female_seqs"] else 0)
             estimated_males, estimated_females = (max_male_seq + 1) // 2 if max_male_seq > 0 else 0, max_female_seq // 2 if max_female_seq > 0 else 0
-            analysis_report[f"{area_name} ({date_str})"] = {"有效样本数量": len(data["male_seqs"]) + len(data["female_seqs"]), "估算男性登记数": estimated_males, "估算女性登记数": estimated_females, "估算总登记数": estimated_males + estimated_females, "备注": "基于样本中最大顺序码的统计估算，非精确值。"}
+            analysis_report[f"{area_name} ({date_str})"] = {"有效样本数量": male_count + female_count, "估算男性登记数": estimated_males, "估算女性登记数": estimated_females, "估算总登记数": estimated_males + estimated_females, "备注": "基于样本中最大顺序码的统计估算，非精确值。"}
         
         return {
-            "summary": {"total_records": len(id_list), "valid_records": len(valid_ids), "invalid_records": len(invalid_details)},
+            "summary": {"total_records": len(id_list), "valid_records": valid_count, "invalid_records": invalid_count},
             "analysis_report": analysis_report,
             "invalid_details": invalid_details
         }
 
+_worker_toolkit = None
+
+def _available_cpus() -> int:
+    # 优先按 CPU 亲和性计数 (遵从 taskset/容器限制), 不支持的平台退回 os.cpu_count()
+    if hasattr(os, 'sched_getaffinity'): return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def _init_worker(area_codes):
+    # 子进程初始化: 每个进程只接收一次主进程的行政区划代码表
+    global _worker_toolkit
+    _worker_toolkit = IDCardToolkit(area_codes=area_codes)
+
+def _analyze_chunk(chunk: list, today: datetime.date) -> tuple[int, list, dict]:
+    invalid_records = []
+    add_invalid = invalid_records.append
+    valid_count, _, stats = _worker_toolkit._collect_stats(chunk, today, lambda item: add_invalid((item["号码"], item["错误原因"])))
+    return valid_count, invalid_records, stats
+
 def main_cli():
     try:
         toolkit = IDCardToolkit()
@@ -152,7 +301,7 @@ def main_cli():
                 if input("是否将结果保存到文件? (y/n): ").lower() == 'y':
                     filename = f"guess_{area_code}_{birth_date}_{gender.upper()}_{time.strftime('%Y%m%d_%H%M%S')}.txt"
                     try:
-                        with open(filename, 'w') as f: f.write('\n'.join(results))
+                        with open(filename, 'w', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f: f.write('\n'.join(results))
                         print(f"结果已成功保存到文件: {filename}")
                     except IOError as e: print(f"文件保存失败: {e}")
             print("------------------")
@@ -161,51 +310,57 @@ def main_cli():
             print("--- 批量分析工具 ---")
             filename = input("请输入包含身份证号码列表的文件名 (默认为 id_list.txt): ").strip() or "id_list.txt"
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    id_list = [line.strip() for line in f if line.strip()]
+                # 整体读入后再按行切分, 避免逐行迭代文件对象的开销; 文本模式已将 \r\n 和 \r 统一为 \n, 只按 \n 切分以保持与逐行读取相同的分行规则
+                with open(filename, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+                    id_list = [line for line in map(str.strip, f.read().split('\n')) if line]
                 if not id_list:
                     print(f"文件 '{filename}' 为空或不包含有效行。")
                     continue
 
-                full_result = toolkit.analyze_population_sample(id_list)
-                summary, report_data, invalid_data = full_result["summary"], full_result["analysis_report"], full_result["invalid_details"]
-                
-                # 1. 控制台输出简洁摘要
-                print("\n--- 分析摘要 ---")
-                print(f"共处理 {summary['total_records']} 条记录。")
-                print(f"  - ✔️ 有效记录: {summary['valid_records']} 条")
-                print(f"  - ❌ 无效记录: {summary['invalid_records']} 条")
-
-                # 2. 生成详细报告文件
-                report_filename = f"report_{filename.replace('.', '_')}_{time.strftime('%Y%m%d_%H%M%S')}.txt"
-                with open(report_filename, 'w', encoding='utf-8') as f:
-                    f.write("身份证号码批量分析报告\n")
-                    f.write(f"生成时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"数据源文件: {filename}\n")
-                    f.write("="*50 + "\n\n")
-
-                    f.write("【1. 分析摘要】\n")
-                    f.write(f"  - 总计处理记录: {summary['total_records']} 条\n")
-                    f.write(f"  - 有效记录数量: {summary['valid_records']} 条\n")
-                    f.write(f"  - 无效记录数量: {summary['invalid_records']} 条\n\n")
-
-                    f.write("【2. 人口估算统计报告】\n")
+                # 无效记录直接流式写入临时文件, 待摘要写完后再拼接到报告末尾
+                with tempfile.TemporaryFile('w+', encoding='utf-8', buffering=IO_BUFFER_SIZE) as invalid_file:
+                    workers = _available_cpus() if len(id_list) >= PARALLEL_MIN_RECORDS else 1
+                    full_result = toolkit.analyze_population_sample(id_list, invalid_sink=lambda item: invalid_file.write(f"  - 号码: {item['号码']:<20} | 原因: {item['错误原因']}\n"), workers=workers)
+                    summary, report_data = full_result["summary"], full_result["analysis_report"]
+
+                    # 1. 控制台输出简洁摘要
+                    print("\n--- 分析摘要 ---")
+                    print(f"共处理 {summary['total_records']} 条记录。")
+                    print(f"  - ✔️ 有效记录: {summary['valid_records']} 条")
+                    print(f"  - ❌ 无效记录: {summary['invalid_records']} 条")
+
+                    # 2. 生成详细报告文件
+                    report_filename = f"report_{filename.replace('.', '_')}_{time.strftime('%Y%m%d_%H%M%S')}.txt"
+                    # 报告内容先在内存中拼接, 最后一次性写入文件
+                    lines = []
+                    lines.append("身份证号码批量分析报告\n")
+                    lines.append(f"生成时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                    lines.append(f"数据源文件: {filename}\n")
+                    lines.append("="*50 + "\n\n")
+
+                    lines.append("【1. 分析摘要】\n")
+                    lines.append(f"  - 总计处理记录: {summary['total_records']} 条\n")
+                    lines.append(f"  - 有效记录数量: {summary['valid_records']} 条\n")
+                    lines.append(f"  - 无效记录数量: {summary['invalid_records']} 条\n\n")
+
+                    lines.append("【2. 人口估算统计报告】\n")
                     if report_data:
                         for key, data in report_data.items():
-                            f.write(f"\n  分析对象: {key}\n")
+                            lines.append(f"\n  分析对象: {key}\n")
                             for sub_key, val in data.items():
-                                f.write(f"    - {sub_key}: {val}\n")
+                                lines.append(f"    - {sub_key}: {val}\n")
                     else:
-                        f.write("  在提供的列表中未找到任何有效的身份证号码进行分析。\n")
-                    f.write("\n" + "="*50 + "\n\n")
+                        lines.append("  在提供的列表中未找到任何有效的身份证号码进行分析。\n")
+                    lines.append("\n" + "="*50 + "\n\n")
+
+                    lines.append("【3. 无效记录详情】\n")
+                    if not summary['invalid_records']:
+                        lines.append("  所有记录均有效，无无效记录。\n")
+                    with open(report_filename, 'w', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+                        f.write(''.join(lines))
+                        invalid_file.seek(0)
+                        shutil.copyfileobj(invalid_file, f, IO_BUFFER_SIZE)
 
-                    f.write("【3. 无效记录详情】\n")
-                    if invalid_data:
-                        for item in invalid_data:
-                            f.write(f"  - 号码: {item['号码']:<20} | 原因: {item['错误原因']}\n")
-                    else:
-                        f.write("  所有记录均有效，无无效记录。\n")
-                
                 print(f"\n✅ 详细分析报告已生成: {report_filename}")
 
             except FileNotFoundError: